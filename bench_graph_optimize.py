@@ -0,0 +1,67 @@
+import contextlib
+import io
+import time
+
+import numpy as np
+
+import degrad.numpy_wrapper as anp
+from degrad.nodes import Node
+from degrad.optimize import optimize_graph, replay
+
+
+def exp_log_repeated(x, y):
+    exp_log = anp.exp(x) + anp.log(x)
+    return exp_log ** 2 + (anp.exp(x) + anp.log(x)) * anp.sin(x)
+
+
+def repeated_square(x, y):
+    out = anp.square(x)
+    for i in range(1, 20):
+        out = out + anp.square(x) * float(i)
+    return out
+
+
+def constant_subgraph(x, y):
+    scale = anp.exp(anp.sin(y)) * anp.cos(y) + anp.square(y)
+    return anp.multiply(scale, anp.sin(x)) + anp.multiply(scale, anp.cos(x))
+
+
+BENCHMARKS = [exp_log_repeated, repeated_square, constant_subgraph]
+
+
+def _time(f, repeat=20):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            f()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(shape=(100,)):
+    rng = np.random.default_rng(0)
+    print(f"{'graph':<20}{'nodes':>12}{'backward ms':>18}{'replay ms':>18}")
+    for fun in BENCHMARKS:
+        x = Node.new_root(rng.uniform(0.5, 1.5, size=shape))
+        y = Node.new_root(rng.uniform(0.5, 1.5, size=shape))
+        out = fun(x, y)
+        stats = {}
+        opt = optimize_graph(out, wrt=x, stats=stats)
+
+        def backward(node):
+            node.zero_grad()
+            node.backward(1.0)
+            return x.grad
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            grad_before, grad_after = backward(out).copy(), backward(opt)
+        assert np.allclose(grad_before, grad_after)
+        assert np.allclose(replay(out), replay(opt))
+
+        times = [_time(lambda: backward(out)), _time(lambda: backward(opt)),
+                 _time(lambda: replay(out)), _time(lambda: replay(opt))]
+        print(f"{fun.__name__:<20}{stats['nodes_before']:>5} -> {stats['nodes_after']:<4}"
+              f"{times[0] * 1e3:>8.2f} -> {times[1] * 1e3:<7.2f}{times[2] * 1e3:>8.2f} -> {times[3] * 1e3:<7.2f}")
+
+
+if __name__ == "__main__":
+    run()
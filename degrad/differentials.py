@@ -35,9 +35,22 @@ def replace_zero(x, val):
     return np.where(x, x, val)
 
 
+def unbroadcast(x, target_meta):
+    shape, ndim, dtype, iscomplex = target_meta
+    # Sum out the axes numpy broadcasting added or stretched
+    while np.ndim(x) > ndim:
+        x = np.sum(x, axis=0)
+    for axis, size in enumerate(shape):
+        if size == 1 and np.ndim(x) == ndim and np.shape(x)[axis] != 1:
+            x = np.sum(x, axis=axis, keepdims=True)
+    if np.iscomplexobj(x) and not iscomplex:
+        x = np.real(x)
+    return x
+
+
 def unbroadcast_f(target, f):
     target_meta = np.shape(target), np.ndim(target), np.result_type(target), np.iscomplexobj(target)
-    return lambda g: f(g)
+    return lambda g: unbroadcast(f(g), target_meta)
 
 
 # ------ Single input functions ----------
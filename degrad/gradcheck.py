@@ -0,0 +1,101 @@
+import time
+
+import numpy as np
+
+from degrad.differentials import primitive_diff_func
+from degrad.gradient import grad
+
+EPS = 1e-6
+RTOL = 1e-5
+ATOL = 1e-6
+
+
+def _batched_diff(fun, x, directions, eps):
+    """
+    Central differences of sum(fun(.)) along every direction, using a single
+    vectorized call of fun on the stacked perturbations whenever possible.
+    """
+    k = directions.shape[0]
+    stacked = np.concatenate([x[None] + eps * directions, x[None] - eps * directions])
+    # A batched call is only trusted if it gives exactly one unbatched output per point:
+    # a leading axis of size 2k alone could be data that fun broadcasts against
+    expected_shape = (2 * k,) + np.shape(fun(x))
+    try:
+        out = np.asarray(fun(stacked), dtype=float)
+        if out.shape != expected_shape:
+            raise ValueError("fun does not broadcast over a leading batch axis")
+    except (ValueError, TypeError):
+        # fun mixes up the batch axis (e.g. reduces over it), evaluate one point at a time
+        out = np.stack([np.asarray(fun(p), dtype=float) for p in stacked])
+    # Difference before reducing, so untouched entries cancel exactly
+    diff = (out[:k] - out[k:]).reshape(k, -1).sum(axis=1)
+    return diff / (2 * eps)
+
+
+def _max_error(analytic, numeric, rtol, atol):
+    return float(np.max(np.abs(analytic - numeric) / (atol + rtol * np.abs(numeric)), initial=0.0))
+
+
+def check_grads(fun, x, modes=("central", "proj"), eps=EPS, rtol=RTOL, atol=ATOL, n_proj=8, seed=0):
+    """
+    Compares grad(fun)(x) against batched central differences of sum(fun(x)).
+
+    "central" perturbs every coordinate of x, "proj" checks the directional
+    derivative along n_proj random unit directions. Returns a dict mapping each
+    mode to its max error (in units of atol + rtol * |numeric|) and raises an
+    AssertionError if any error exceeds 1.
+    """
+    x = np.asarray(x, dtype=float)
+    analytic = np.broadcast_to(np.asarray(grad(fun)(x), dtype=float), x.shape).ravel()
+
+    errors = {}
+    for mode in modes:
+        if mode == "central":
+            directions = np.eye(x.size).reshape((x.size,) + x.shape)
+            expected = analytic
+        elif mode == "proj":
+            rng = np.random.default_rng(seed)
+            directions = rng.standard_normal((n_proj, x.size))
+            directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+            expected = directions @ analytic
+            directions = directions.reshape((n_proj,) + x.shape)
+        else:
+            raise ValueError(f"Unknown gradient check mode: {mode}")
+        numeric = _batched_diff(fun, x, directions, eps)
+        errors[mode] = _max_error(expected, numeric, rtol, atol)
+
+    failed = {mode: err for mode, err in errors.items() if err > 1.0}
+    if failed:
+        raise AssertionError(f"Gradient check failed for {getattr(fun, '__name__', fun)}: {failed}")
+    return errors
+
+
+def check_all_primitives(shape=(5,), modes=("central", "proj"), seed=0, **kwargs):
+    """
+    Runs check_grads on every VJP in primitive_diff_func, once per argument,
+    with random array inputs. Returns {name: {"argnum": .., "errors": .., "time": ..}}
+    entries; failures are reported in "errors" as the AssertionError text.
+    """
+    rng = np.random.default_rng(seed)
+    report = {}
+    for fun in primitive_diff_func:
+        nin = getattr(getattr(fun, "__wrapped__", fun), "nin", 1)
+        # Disjoint ranges keep maximum/minimum away from ties while staying inside
+        # the domain of log/sqrt/power. They are interleaved across elements, so
+        # every argument of a binary VJP wins (and loses) somewhere and each
+        # branch of maximum/minimum gets a non-zero gradient.
+        low, high = rng.uniform(0.3, 1.2, size=shape), rng.uniform(1.6, 2.5, size=shape)
+        swap = np.arange(low.size).reshape(low.shape) % 2 == 1
+        args = [np.where(swap, high, low)] + [np.where(swap, low, high) for _ in range(nin - 1)]
+        for argnum in range(nin):
+            def partial(z, argnum=argnum):
+                return fun(*args[:argnum], z, *args[argnum + 1:])
+
+            partial.__name__ = f"{fun.__name__}[{argnum}]"
+            start = time.perf_counter()
+            try:
+                errors = check_grads(partial, args[argnum], modes=modes, seed=seed, **kwargs)
+            except AssertionError as e:
+                errors = str(e)
+            report[partial.__name__] = {"argnum": argnum, "errors": errors, "time": time.perf_counter() - start}
+    return report
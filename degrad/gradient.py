@@ -1,17 +1,27 @@
-from degrad.nodes import Node
+import queue
+import threading
+
+import numpy as np
 
+from degrad.nodes import Node
+from degrad.optimize import optimize_graph
 
+_DONE = object()
 
 
-def grad(fun):
+def grad(fun, optimize=False):
     """
     Returns a function that computes the gradient of fun at a given input x.
+    With optimize=True the recorded graph is passed through optimize_graph
+    before the backward pass.
     """
 
     def grad_fn(x):
         # Build computation graph
         root = Node.new_root(x)
         out = fun(root)
+        if optimize:
+            out = optimize_graph(out, wrt=root)
         # Zero gradients before backward
         out.zero_grad()
         # Backward pass
@@ -19,3 +29,91 @@ def grad(fun):
         return root.grad
 
     return grad_fn
+
+
+def _put_until_stopped(buffer, item, stop):
+    while not stop.is_set():
+        try:
+            buffer.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _read_ahead(batches, depth=1):
+    # Pulls up to depth batches ahead of the consumer on a background thread
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def worker():
+        try:
+            for batch in batches:
+                if not _put_until_stopped(buffer, (batch, None), stop):
+                    return
+            _put_until_stopped(buffer, (_DONE, None), stop)
+        except Exception as e:
+            _put_until_stopped(buffer, (_DONE, e), stop)
+
+    thread = threading.Thread(target=worker, name="degrad-read-ahead", daemon=True)
+    thread.start()
+    try:
+        while True:
+            batch, error = buffer.get()
+            if batch is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield batch
+    finally:
+        # Consumer is done (or failed): release the worker and any batch it already read
+        stop.set()
+        while True:
+            try:
+                buffer.get_nowait()
+            except queue.Empty:
+                break
+        thread.join(timeout=1.0)
+
+
+def grad_over_stream(fun, params, batches, prefetch=False, optimize=False):
+    """
+    Returns the gradient of the sum of fun(params, batch) over every batch in
+    the iterable batches.
+
+    params is either a single array or several parameters given as a tuple
+    (e.g. (W, b)) or as a list of ndarrays (e.g. [W, b]); in the latter case fun
+    receives a tuple of nodes and one gradient per parameter is returned, in a
+    container of the same type. A list of plain numbers such as [0.5, 1.0] is a
+    single vector parameter.
+
+    Each batch gets its own graph, which is released before the next batch is
+    processed, and its gradient is added into one preallocated buffer per
+    parameter, so memory does not grow with the number of batches. With
+    prefetch=True the next batch is read on a background thread while the
+    current one is differentiated.
+    """
+    multiple = isinstance(params, tuple) or (
+        isinstance(params, list) and any(isinstance(p, np.ndarray) for p in params))
+    values = [np.asarray(p, dtype=float) for p in (params if multiple else (params,))]
+    totals = [np.zeros_like(v) for v in values]
+    stream = _read_ahead(batches) if prefetch else batches
+    try:
+        for batch in stream:
+            roots = tuple(Node.new_root(v) for v in values)
+            out = fun(roots if multiple else roots[0], batch)
+            if optimize:
+                out = optimize_graph(out, wrt=roots)
+            # Fresh graph, gradients already start at zero
+            out.backward(1.0)
+            for i, total in enumerate(totals):
+                total += roots[i].grad
+            # Drop this batch's graph before the next one is built
+            del roots, out
+    finally:
+        if prefetch:
+            # Stops the read-ahead thread right away if fun raised
+            stream.close()
+    if not multiple:
+        return totals[0]
+    return tuple(totals) if isinstance(params, tuple) else totals
@@ -1,15 +1,28 @@
 import operator
+import time
+
+import numpy as np
 
 from degrad.differentials import primitive_diff_func
 import degrad.numpy_wrapper as anp
 
+
+def _fmt(value):
+    # Works for plain floats as well as ndarray values/gradients
+    return np.array2string(np.asarray(value), precision=2, floatmode='fixed')
+
+
 class Node:
-    def __init__(self, value, func=None, parents=(), node_indices=None, original_args=None):
+    # Active GraphStats recorders, see degrad/stats.py
+    _recorders = []
+
+    def __init__(self, value, func=None, parents=(), node_indices=None, original_args=None, kwargs=None):
         self._value = value
         self.func = func
         self.parents = parents
         self.node_indices = node_indices
         self.original_args = original_args
+        self.kwargs = kwargs or {}
         self.grad = 0.0
         self._vjpmaker = primitive_diff_func.get(func, None)
 
@@ -22,6 +35,7 @@ class Node:
         self.parents = ()
         self.node_indices = None
         self.original_args = None
+        self.kwargs = {}
         self.grad = 0.0
         self._vjpmaker = None
 
@@ -107,9 +121,9 @@ class Node:
     def backward(self, grad_output=1.0):
         self.grad = grad_output
         topo_order = list(Node._toposort(self))
-        print(f"Processing order (from output to input): {[f'Node({n._value:.2f})' for n in topo_order]}")
+        print(f"Processing order (from output to input): {[f'Node({_fmt(n._value)})' for n in topo_order]}")
         for i, node in enumerate(topo_order):
-            print(f"Step {i + 1}: Processing Node({node._value:.2f}) with grad={node.grad:.2f}")
+            print(f"Step {i + 1}: Processing Node({_fmt(node._value)}) with grad={_fmt(node.grad)}")
             if node.func and node._vjpmaker and node.node_indices is not None:
                 print(
                     f"  node.func: {getattr(node.func, '__name__', str(node.func))}, node_indices: {node.node_indices}")
@@ -129,14 +143,21 @@ class Node:
                 
                 print(f"    all_args: {all_args}")
                 print(f"    vjp function: {node._vjpmaker}")
+                recorders = Node._recorders
+                if recorders:
+                    start = time.perf_counter()
                 vjp = node._vjpmaker(node.node_indices, node._value, tuple(all_args), {})
                 grads = tuple(vjp(node.grad))
+                if recorders:
+                    elapsed = time.perf_counter() - start
+                for recorder in recorders:
+                    recorder._record_backward(node, elapsed)
                 print(f"    grads returned: {grads}")
                 for parent, g in zip(node.parents, grads):
                     print(f"     -> Updating parent {parent} with grad {g}")
                     if isinstance(parent, Node):
                         parent.grad += g
-                        print(f"     -> Node({parent._value:.2f}) grad updated to {parent.grad:.2f}")
+                        print(f"     -> Node({_fmt(parent._value)}) grad updated to {_fmt(parent.grad)}")
             else:
                 print(
                     f"  Skipping node: {node}, func: {node.func}, vjpmaker: {node._vjpmaker}, node_indices: {node.node_indices}")
@@ -151,19 +172,21 @@ class Node:
 
     @staticmethod
     def _toposort(end_node, parents=operator.attrgetter("parents")):
-        visited = set()
+        # Iterative post-order DFS: a recursive closure would form a reference
+        # cycle that keeps the whole graph alive until the garbage collector runs
+        visited = {end_node}
         order = []
-
-        def dfs(n):
-            if n in visited:
-                return
-            visited.add(n)
-            for p in parents(n):
-                if isinstance(p, Node):
-                    dfs(p)
-            order.append(n)
-
-        dfs(end_node)
+        stack = [(end_node, iter(parents(end_node)))]
+        while stack:
+            n, pending = stack[-1]
+            for p in pending:
+                if isinstance(p, Node) and p not in visited:
+                    visited.add(p)
+                    stack.append((p, iter(parents(p))))
+                    break
+            else:
+                stack.pop()
+                order.append(n)
         # return order
         return reversed(order)
 
@@ -0,0 +1,111 @@
+import numpy as np
+
+from degrad.nodes import Node
+
+# Arrays up to this many elements are keyed by content, larger ones by identity
+CONTENT_KEY_MAX_SIZE = 64
+
+
+def _const_key(value):
+    if isinstance(value, np.ndarray):
+        if value.size > CONTENT_KEY_MAX_SIZE:
+            # Copying every data batch into the key would double memory; the graph
+            # keeps the array alive for the whole pass, so its id stays unique
+            return ("id", id(value))
+        return ("ndarray", value.shape, value.dtype.str, value.tobytes())
+    try:
+        hash(value)
+    except TypeError:
+        return ("id", id(value))
+    # Keep 2 and 2.0 apart, they give different result dtypes
+    return (type(value).__name__, value)
+
+
+def _graph_nodes(output):
+    # Inputs first
+    return list(reversed(list(Node._toposort(output))))
+
+
+def optimize_graph(output, wrt=None, stats=None):
+    """
+    Rewrites the graph recorded under output and returns the new output node.
+
+    - Constant folding: nodes that do not depend on any root in wrt (all roots
+      when wrt is None) become plain values, so backward never visits them.
+    - Common-subexpression elimination: nodes with the same func and the same
+      (deduplicated) arguments are merged into one.
+    - Dead-node removal: only nodes the new output still reaches are kept.
+
+    Recorded values are reused, nothing is recomputed. Roots are shared with the
+    original graph so their .grad is filled by the optimized backward pass.
+    If a stats dict is given it is filled with node counts before/after the pass.
+    """
+    if wrt is not None:
+        wrt = {id(n) for n in (wrt if isinstance(wrt, (list, tuple, set)) else (wrt,))}
+
+    stats = {} if stats is None else stats
+    stats.update(nodes_before=0, folded=0, deduplicated=0)
+    replacement = {}
+    seen = {}
+    for node in _graph_nodes(output):
+        stats["nodes_before"] += 1
+        if node.func is None:
+            is_variable = wrt is None or id(node) in wrt
+            replacement[id(node)] = node if is_variable else node._value
+            continue
+
+        args = node.original_args if node.original_args is not None else node.parents
+        new_args = tuple(replacement[id(a)] if isinstance(a, Node) else a for a in args)
+        node_indices = [i for i, a in enumerate(new_args) if isinstance(a, Node)]
+        if not node_indices:
+            stats["folded"] += 1
+            replacement[id(node)] = node._value
+            continue
+
+        key = (node.func,) + tuple(("node", id(a)) if isinstance(a, Node) else _const_key(a) for a in new_args)
+        # where=, out=, dtype=... change the result, so they are part of the key
+        key += tuple(sorted((name, _const_key(v)) for name, v in node.kwargs.items()))
+        if key in seen:
+            stats["deduplicated"] += 1
+            replacement[id(node)] = seen[key]
+            continue
+
+        parents = tuple(new_args[i] for i in node_indices)
+        new_node = Node(node._value, node.func, parents, node_indices, original_args=new_args,
+                        kwargs=node.kwargs)
+        seen[key] = replacement[id(node)] = new_node
+
+    new_output = replacement[id(output)]
+    if not isinstance(new_output, Node):
+        # Output does not depend on wrt at all
+        new_output = Node.new_root(new_output)
+    stats["nodes_after"] = len(_graph_nodes(new_output))
+    stats["removed"] = stats["nodes_before"] - stats["nodes_after"]
+    return new_output
+
+
+def _replay_kwargs(kwargs):
+    # out= holds the recorded value, write into a copy so replay leaves the graph untouched
+    out = kwargs.get("out")
+    if isinstance(out, np.ndarray):
+        return dict(kwargs, out=out.copy())
+    if isinstance(out, tuple):
+        return dict(kwargs, out=tuple(o.copy() if isinstance(o, np.ndarray) else o for o in out))
+    return kwargs
+
+
+def replay(output, values=None):
+    """
+    Re-evaluates the graph under output without recording, with the roots in
+    values (a {root_node: value} dict) replaced. Returns the output value.
+    """
+    values = {id(k): v for k, v in (values or {}).items()}
+    results = {}
+    for node in _graph_nodes(output):
+        if node.func is None:
+            results[id(node)] = values.get(id(node), node._value)
+            continue
+        args = node.original_args if node.original_args is not None else node.parents
+        argvals = [results[id(a)] if isinstance(a, Node) else a for a in args]
+        results[id(node)] = node.func.__wrapped__(*argvals, **_replay_kwargs(node.kwargs))
+    return results[id(output)]
@@ -1,4 +1,5 @@
 import functools
+import time
 
 
 def primitive(f_raw):
@@ -16,8 +17,16 @@ def primitive(f_raw):
             # Get the values for computation (Node values for Node objects, original values for others)
             argvals = tuple([arg._value if isinstance(arg, Node) else arg for arg in args])
             
+            # Only time the call while a graph_stats recorder is active
+            recorders = Node._recorders
+            if recorders:
+                start = time.perf_counter()
             ans = f_raw(*argvals, **kwargs)
-            node = Node(ans, f_wrapped, parents, node_indices, original_args=args)
+            if recorders:
+                elapsed = time.perf_counter() - start
+            node = Node(ans, f_wrapped, parents, node_indices, original_args=args, kwargs=kwargs)
+            for recorder in recorders:
+                recorder._record_forward(node, elapsed)
             return node
         else:
             return f_raw(*args, **kwargs)
@@ -0,0 +1,188 @@
+import json
+import sys
+import weakref
+
+import numpy as np
+
+from degrad.nodes import Node
+
+ROOT = "<root>"
+
+
+def _nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+def _name(node):
+    return ROOT if node.func is None else getattr(node.func, "__name__", str(node.func))
+
+
+class GraphStats:
+    """
+    Structure, memory and timing report for a recorded graph.
+
+    Used as a context manager it also records the time spent in every primitive
+    call (forward) and every VJP (backward) made inside the with block:
+
+        with graph_stats() as stats:
+            out = f(Node.new_root(x))
+            out.backward()
+        print(stats.to_json())
+
+    Both timings accumulate per node: calling out.backward() twice reports the
+    VJP time of both passes. Timings of nodes that have been freed are dropped,
+    so graphs released inside the block (e.g. by grad_over_stream) are not
+    reported and never credited to newer nodes.
+    """
+
+    def __init__(self, output=None):
+        self.output = output
+        self.forward_time = {}
+        self.backward_time = {}
+        self._last_node = None
+
+    def __enter__(self):
+        Node._recorders.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        Node._recorders.remove(self)
+        return False
+
+    # Timings are keyed by id(node). The entries are removed when the node dies,
+    # otherwise python would hand the id to a new node and credit it old times.
+    def _track(self, node):
+        key = id(node)
+        if key not in self.forward_time and key not in self.backward_time:
+            weakref.finalize(node, self._forget, key)
+        return key
+
+    def _forget(self, key):
+        self.forward_time.pop(key, None)
+        self.backward_time.pop(key, None)
+
+    def _record_forward(self, node, elapsed):
+        key = self._track(node)
+        self.forward_time[key] = self.forward_time.get(key, 0.0) + elapsed
+        # Weak, so the recorder does not keep the last graph alive
+        self._last_node = weakref.ref(node)
+
+    def _record_backward(self, node, elapsed):
+        key = self._track(node)
+        self.backward_time[key] = self.backward_time.get(key, 0.0) + elapsed
+
+    def _output(self, output):
+        # Defaults to the last node created inside the with block
+        last = self._last_node() if self._last_node is not None else None
+        for candidate in (output, self.output, last):
+            if candidate is not None:
+                return candidate
+        raise ValueError("No output node given and none was recorded")
+
+    def nodes(self, output=None):
+        """
+        Per-node records, inputs first: name, parents, depth, fan-in, fan-out,
+        bytes retained and forward/backward time.
+        """
+        order = list(reversed(list(Node._toposort(self._output(output)))))
+        index = {id(n): i for i, n in enumerate(order)}
+        seen_values = set()
+        records = []
+        for node in order:
+            parents = [index[id(p)] for p in node.parents if isinstance(p, Node)]
+            # Count each array once, even when several nodes share it
+            kept = [node._value] + [a for a in (node.original_args or ()) if not isinstance(a, Node)]
+            retained = sum(_nbytes(v) for v in kept if id(v) not in seen_values)
+            seen_values.update(id(v) for v in kept)
+            records.append({
+                "id": index[id(node)],
+                "name": _name(node),
+                "parents": parents,
+                "depth": 1 + max((records[p]["depth"] for p in parents), default=-1),
+                "fan_in": len(parents),
+                "fan_out": 0,
+                "bytes": retained,
+                "forward_time": self.forward_time.get(id(node), 0.0),
+                "backward_time": self.backward_time.get(id(node), 0.0),
+            })
+            for p in parents:
+                records[p]["fan_out"] += 1
+        return records
+
+    def summary(self, output=None):
+        """
+        Aggregated report: node count, depth, fan-in/fan-out, totals and a
+        per-primitive breakdown of count, bytes and time.
+        """
+        records = self.nodes(output)
+        by_primitive = {}
+        for r in records:
+            entry = by_primitive.setdefault(r["name"], {"count": 0, "bytes": 0, "forward_time": 0.0,
+                                                        "backward_time": 0.0})
+            entry["count"] += 1
+            entry["bytes"] += r["bytes"]
+            entry["forward_time"] += r["forward_time"]
+            entry["backward_time"] += r["backward_time"]
+        fan_in = [r["fan_in"] for r in records]
+        fan_out = [r["fan_out"] for r in records]
+        return {
+            "nodes": len(records),
+            "depth": records[-1]["depth"],
+            "fan_in": {"max": max(fan_in), "mean": sum(fan_in) / len(records)},
+            "fan_out": {"max": max(fan_out), "mean": sum(fan_out) / len(records)},
+            "bytes": sum(r["bytes"] for r in records),
+            "forward_time": sum(r["forward_time"] for r in records),
+            "backward_time": sum(r["backward_time"] for r in records),
+            "by_primitive": dict(sorted(by_primitive.items(), key=lambda item: -item[1]["count"])),
+        }
+
+    def to_json(self, path=None, output=None):
+        """
+        Returns the summary as a JSON string, also written to path if given.
+        """
+        text = json.dumps(self.summary(output), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def to_dot(self, path=None, output=None, cost="time"):
+        """
+        Returns a Graphviz DOT description of the graph, also written to path if
+        given. Node size grows with cost: "time" (forward + backward) or "bytes".
+        """
+        records = self.nodes(output)
+        if cost == "time":
+            costs = [r["forward_time"] + r["backward_time"] for r in records]
+        elif cost == "bytes":
+            costs = [r["bytes"] for r in records]
+        else:
+            raise ValueError(f"Unknown cost: {cost}")
+        max_cost = max(costs) or 1.0
+
+        lines = ["digraph degrad {", '  node [shape=box, style=filled, fillcolor="#dde8f5", fixedsize=true];']
+        for r, c in zip(records, costs):
+            scale = c / max_cost
+            label = f"{r['name']}\\n{r['bytes']} B\\n{(r['forward_time'] + r['backward_time']) * 1e6:.1f} us"
+            lines.append(f'  n{r["id"]} [label="{label}", width={1.0 + 2.0 * scale:.2f}, '
+                         f'height={0.6 + 1.2 * scale:.2f}, fontsize={10 + int(8 * scale)}];')
+        for r in records:
+            lines.extend(f"  n{p} -> n{r['id']};" for p in r["parents"])
+        lines.append("}")
+
+        text = "\n".join(lines) + "\n"
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+
+def graph_stats(output_node=None):
+    """
+    Returns a GraphStats for the graph under output_node. Can also be used as a
+    context manager to record forward/backward timings, in which case the
+    output defaults to the last node created inside the with block.
+    """
+    return GraphStats(output_node)
@@ -1,7 +1,17 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+
 import numpy as np
 from degrad.nodes import Node
-from degrad.gradient import grad
+from degrad.gradient import grad, grad_over_stream
 from degrad import numpy_wrapper as anp
+from degrad.gradcheck import check_grads, check_all_primitives
+from degrad.optimize import optimize_graph, replay, _const_key
+from degrad.stats import graph_stats
 
 
 def test_basic_operations():
@@ -289,6 +299,290 @@ def test_complex_expression():
     assert not np.isinf(x.grad)
 
 
+def test_check_grads():
+    """Test the vectorized gradient checker on scalar and array inputs"""
+    print("\n=== Testing Gradient Checker ===")
+
+    def f(x):
+        return (anp.exp(x) + anp.log(x)) ** 2
+
+    errors = check_grads(f, 3.0)
+    print(f"check_grads scalar: {errors}")
+    assert set(errors) == {"central", "proj"}
+
+    errors = check_grads(f, np.linspace(0.5, 2.0, 6).reshape(2, 3))
+    print(f"check_grads array: {errors}")
+
+    # Data whose leading axis happens to match the batch size (2k) must not be
+    # mistaken for the perturbation batch
+    errors = check_grads(lambda a: a * np.array([1.0, 2.0]), 0.7)
+    print(f"check_grads against (2,) data: {errors}")
+    D = np.arange(18.0).reshape(6, 3) / 10
+    errors = check_grads(lambda w: anp.square(w * D), np.ones(3))
+    print(f"check_grads against (6, 3) data: {errors}")
+
+    # A function whose gradient is not what grad() returns must be rejected
+    def wrong(x):
+        return anp.sin(x) if isinstance(x, Node) else np.cos(x)
+
+    try:
+        check_grads(wrong, np.array([0.3, 0.7]))
+    except AssertionError as e:
+        print(f"Wrong gradient caught: {e}")
+    else:
+        raise AssertionError("check_grads accepted a wrong gradient")
+
+
+def test_all_primitive_vjps():
+    """Sweep every registered VJP over array inputs"""
+    print("\n=== Testing All Registered VJPs ===")
+
+    report = check_all_primitives(shape=(4, 3))
+    for name, entry in report.items():
+        print(f"{name}: {entry['errors']} ({entry['time'] * 1e3:.1f} ms)")
+    assert report
+    assert all(isinstance(entry["errors"], dict) for entry in report.values())
+
+    # A VJP that is wrong on only one branch of maximum must still be caught
+    from degrad.differentials import primitive_diff_func, register_diff, balanced_eq
+    original = primitive_diff_func[anp.maximum]
+    try:
+        register_diff(
+            anp.maximum,
+            lambda ans, x, y: lambda g: 0 * g,
+            lambda ans, x, y: lambda g: g * balanced_eq(y, ans, x),
+        )
+        report = check_all_primitives(shape=(4, 3))
+    finally:
+        primitive_diff_func[anp.maximum] = original
+    print(f"Broken maximum VJP: {report['maximum[0]']['errors']}")
+    assert isinstance(report["maximum[0]"]["errors"], str)
+    assert isinstance(report["maximum[1]"]["errors"], dict)
+
+
+def test_optimize_graph():
+    """Test CSE, constant folding and dead-node removal on a recorded graph"""
+    print("\n=== Testing Graph Optimizer ===")
+
+    x = Node.new_root(np.array([0.5, 1.0, 2.0]))
+    y = Node.new_root(1.5)
+    out = anp.square(x) * anp.exp(anp.sin(y)) + anp.square(x) * 2.0
+
+    out.zero_grad()
+    out.backward()
+    expected_grad = x.grad
+
+    stats = {}
+    opt = optimize_graph(out, wrt=x, stats=stats)
+    print(f"Optimizer stats: {stats}")
+    # square(x) is merged, sin(y) and exp(.) are folded, y is no longer part of the graph
+    assert stats["deduplicated"] == 1
+    assert stats["folded"] == 2
+    assert stats["nodes_before"] == 9
+    assert stats["nodes_after"] == 5
+    assert all(n is not y for n in Node._toposort(opt))
+
+    opt.zero_grad()
+    opt.backward()
+    assert np.allclose(x.grad, expected_grad)
+
+    new_x = np.array([1.0, 3.0, 0.25])
+    assert np.allclose(replay(opt, {x: new_x}), replay(out, {x: new_x}))
+    assert np.allclose(replay(opt, {x: new_x}), new_x ** 2 * (np.exp(np.sin(1.5)) + 2.0))
+
+    # Large constants are keyed by identity: the same batch array is still
+    # merged, but its contents are never copied into the CSE key
+    batch = np.linspace(0.0, 1.0, 1000)
+    z = Node.new_root(np.full(1000, 0.5))
+    stats = {}
+    optimize_graph(anp.multiply(z, batch) + anp.multiply(z, batch) + anp.multiply(z, batch.copy()), wrt=z,
+                   stats=stats)
+    assert stats["deduplicated"] == 1
+    assert not any(isinstance(part, bytes) for part in _const_key(batch))
+
+    # grad(..., optimize=True) matches the plain gradient
+    def f(x):
+        return (anp.exp(x) + anp.log(x)) ** 2 + (anp.exp(x) + anp.log(x)) * anp.sin(x)
+
+    assert abs(grad(f, optimize=True)(3.0) - grad(f)(3.0)) < 1e-9
+
+
+def test_optimize_graph_kwargs():
+    """Test that nodes called with different kwargs are neither merged nor replayed without them"""
+    print("\n=== Testing Graph Optimizer With Kwargs ===")
+
+    x = Node.new_root(np.array([2.1, 1.2]))
+    plain = anp.sin(x)
+    masked = anp.sin(x, where=np.array([True, False]), out=np.full(2, 0.5))
+    out = plain + masked
+    recorded = out._value.copy()
+
+    stats = {}
+    opt = optimize_graph(out, wrt=x, stats=stats)
+    print(f"Optimizer stats: {stats}")
+    assert stats["deduplicated"] == 0
+    assert np.allclose(replay(opt), recorded)
+    assert np.allclose(replay(out), recorded)
+    # Replaying must not overwrite the recorded out= array
+    assert np.allclose(masked._value, [np.sin(2.1), 0.5])
+
+    single = anp.exp(x, dtype=np.float32)
+    assert replay(single).dtype == np.float32
+    assert replay(optimize_graph(single * 2.0, wrt=x)).dtype == np.float32
+
+
+def test_grad_over_stream():
+    """Test streaming gradient accumulation against the single-graph gradient"""
+    print("\n=== Testing Streaming Gradient ===")
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, 3))
+    Y = rng.normal(size=60)
+    w = np.array([0.5, -1.0, 2.0])
+
+    def loss(w, batch):
+        x, y = batch
+        return anp.square(w * x - y[:, None])
+
+    expected = grad(lambda w: loss(w, (X, Y)))(w)
+    assert np.shape(expected) == w.shape
+
+    live_roots = []
+
+    def checked_loss(w, batch):
+        # The previous batch's graph must be gone before the next one is built
+        assert all(ref() is None for ref in live_roots)
+        live_roots.append(weakref.ref(w))
+        return loss(w, batch)
+
+    for prefetch in (False, True):
+        batches = ((X[i:i + 7], Y[i:i + 7]) for i in range(0, 60, 7))
+        result = grad_over_stream(checked_loss, w, batches, prefetch=prefetch)
+        print(f"Streamed grad (prefetch={prefetch}): {result}, expected: {expected}")
+        assert np.allclose(result, expected)
+        live_roots.clear()
+
+    # Scalar parameter broadcast against each batch
+    expected = grad(lambda a: anp.square(a * X[:, 0] - Y))(0.3)
+    result = grad_over_stream(lambda a, b: anp.square(a * b[0] - b[1]), 0.3,
+                              [(X[:30, 0], Y[:30]), (X[30:, 0], Y[30:])], optimize=True)
+    assert np.allclose(result, expected)
+
+    # Several differently shaped parameters, one gradient each
+    def affine_loss(params, batch):
+        w, b = params
+        x, y = batch
+        return anp.square(w * x + b - y[:, None])
+
+    w_root, b_root = Node.new_root(w), Node.new_root(np.array(0.2))
+    full = affine_loss((w_root, b_root), (X, Y))
+    full.backward()
+    batches = [(X[:25], Y[:25]), (X[25:], Y[25:])]
+    grad_w, grad_b = grad_over_stream(affine_loss, (w, 0.2), batches, prefetch=True, optimize=True)
+    assert grad_w.shape == w.shape and np.shape(grad_b) == ()
+    assert np.allclose(grad_w, w_root.grad)
+    assert np.allclose(grad_b, b_root.grad)
+
+    grad_w, grad_b = grad_over_stream(affine_loss, [w, np.array(0.2)], batches)
+    assert np.allclose(grad_w, w_root.grad) and np.allclose(grad_b, b_root.grad)
+
+    # A list of numbers is one vector parameter, not several scalars
+    result = grad_over_stream(loss, [0.5, -1.0, 2.0], batches)
+    assert np.allclose(result, grad(lambda w: loss(w, (X, Y)))(w))
+
+    # Errors raised by the data iterator reach the caller
+    def failing_batches():
+        yield X[:5], Y[:5]
+        raise RuntimeError("data source failed")
+
+    try:
+        grad_over_stream(loss, w, failing_batches(), prefetch=True)
+    except RuntimeError as e:
+        print(f"Iterator error propagated: {e}")
+    else:
+        raise AssertionError("grad_over_stream swallowed the iterator error")
+
+    # If fun fails mid-stream the read-ahead thread must not stay blocked on the queue
+    def endless_batches():
+        while True:
+            yield X[:5], Y[:5]
+
+    def failing_loss(w, batch):
+        raise ValueError("bad batch")
+
+    threads_before = threading.active_count()
+    for _ in range(3):
+        try:
+            grad_over_stream(failing_loss, w, endless_batches(), prefetch=True)
+        except ValueError:
+            pass
+    assert threading.active_count() == threads_before, "read-ahead threads left running"
+
+
+def test_graph_stats():
+    """Test the graph statistics report and its JSON/DOT exports"""
+    print("\n=== Testing Graph Statistics ===")
+
+    with graph_stats() as stats:
+        x = Node.new_root(np.linspace(0.5, 2.0, 100))
+        exp_log = anp.exp(x) + anp.log(x)
+        out = exp_log ** 2 + anp.square(x) * 3.0
+        out.zero_grad()
+        out.backward()
+
+    summary = stats.summary()
+    print(f"Graph stats: {summary}")
+    assert summary["nodes"] == 8
+    assert summary["depth"] == 4
+    assert summary["by_primitive"]["add"]["count"] == 2
+    assert summary["by_primitive"]["<root>"]["bytes"] == x._value.nbytes
+    # x feeds exp, log and square
+    assert summary["fan_out"]["max"] == 3
+    assert summary["fan_in"]["max"] == 2
+    assert summary["forward_time"] > 0.0
+    assert summary["backward_time"] > 0.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "stats.json")
+        text = stats.to_json(json_path)
+        with open(json_path) as f:
+            assert json.loads(text) == json.load(f)
+
+        dot = stats.to_dot(os.path.join(tmp, "stats.dot"))
+        assert os.path.exists(os.path.join(tmp, "stats.dot"))
+    assert dot.startswith("digraph degrad {")
+    assert dot.count(" -> ") == 9
+
+    # Several graphs in one block: freed graphs' timings must not be credited to
+    # newer nodes reusing their ids, and both timings accumulate per node.
+    # A fake clock makes every timed primitive call / VJP last exactly 1.0.
+    ticks = iter(range(10 ** 6))
+    real_perf_counter = time.perf_counter
+    time.perf_counter = lambda: float(next(ticks))
+    try:
+        with graph_stats() as stats:
+            for _ in range(50):
+                temp = anp.exp(anp.sin(Node.new_root(np.ones(3))))
+                temp.backward()
+            del temp
+            small_root = Node.new_root(np.ones(3))
+            small = anp.sin(small_root) * 2.0
+            small.backward()
+            small.backward()
+    finally:
+        time.perf_counter = real_perf_counter
+    summary = stats.summary(small)
+    print(f"Two graphs in one block: {summary}")
+    assert summary["forward_time"] == 2.0  # sin, multiply
+    assert summary["backward_time"] == 4.0  # 2 VJPs x 2 backward calls
+    assert len(stats.forward_time) == 2
+
+    # Without the context manager only structure and memory are reported
+    summary = graph_stats(out).summary()
+    assert summary["nodes"] == 8
+    assert summary["forward_time"] == 0.0
+
+
 if __name__ == "__main__":
     print("Running Autograd Tests...")
     
@@ -301,6 +595,12 @@ if __name__ == "__main__":
     test_edge_cases()
     test_multiple_backward_calls()
     test_complex_expression()
+    test_check_grads()
+    test_all_primitive_vjps()
+    test_optimize_graph()
+    test_optimize_graph_kwargs()
+    test_grad_over_stream()
+    test_graph_stats()
     
     print("\n=== All Tests Completed ===")
     print("If no errors occurred, the autograd implementation is working correctly!") 
\ No newline at end of file